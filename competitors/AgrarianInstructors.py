@@ -19,6 +19,7 @@ class SuperPlant(Creature):
     as possible, in random directions.
     """
 
+    __slots__ = ('womb', 'leaf_count', 'all_leaves_grown')
     minimum_baby_strength = Propagator.CREATION_COST + PhotoGland.CREATION_COST + 1
     __instance_count = 0
 
@@ -5,15 +5,26 @@ Created by:
     OCdt Brown, and
     OCdt Gillingham
 """
+from bisect import bisect_left
+from collections import deque
 from random import random
 
 from shared import Creature, Cilia, CreatureTypeSensor, Propagator, Direction, Soil, Plant, Spikes, EnergySensor
 
+_DIRECTIONS = tuple(Direction)
+_rand_dir = Direction.random
+
+# bits set in BugKilla._ready as each organ is grown
+_CILIA, _TYPE_SENSOR, _WOMB, _SPIKES, _ENERGY_SENSOR = 1, 2, 4, 8, 16
+
 
 class BugKilla(Creature):
 
+    __slots__ = ('cilia', 'type_sensor', 'womb', '_ready')
     __instance_count = 0
     __less_reproduction = 350
+    _REPRO_THRESHOLD = 0.9 * Creature.MAX_STRENGTH
+    _ORGANS_NEEDED = _CILIA | _TYPE_SENSOR | _WOMB
 
     def __init__(self):
         super().__init__()
@@ -21,16 +32,19 @@ class BugKilla(Creature):
         self.cilia = None
         self.type_sensor = None
         self.womb = None
-        self.spikes = None
-        self.poison = None
-        self.energy_sensor = None
+        self._ready = 0
+
+    # organs only Spikers and BugAttackers grow aren't set on the rest of the brood
+    def __getattr__(self, name):
+        if name in ('spikes', 'energy_sensor'):
+            return None
+        raise AttributeError(name)
 
     def do_turn(self):
-        if not (self.cilia and self.type_sensor and self.womb):
+        if self._ready != self._ORGANS_NEEDED:
             self.organify()
         else:
-            self.reproduce_if_able()
-            self.move()
+            self.move(self.reproduce_if_able(self.strength()))
 
     @classmethod
     def destroyed(cls):
@@ -41,62 +55,75 @@ class BugKilla(Creature):
         return BugKilla.__instance_count
 
     def organify(self):
-        if not self.cilia and self.strength() > Cilia.CREATION_COST:
+        s = self.strength()
+        if not self.cilia and s > Cilia.CREATION_COST:
             self.cilia = Cilia(self)
-        if not self.type_sensor and self.strength() > CreatureTypeSensor.CREATION_COST:
+            self._ready |= _CILIA
+            s = self.strength()
+        if not self.type_sensor and s > CreatureTypeSensor.CREATION_COST:
             self.type_sensor = CreatureTypeSensor(self)
-        if not self.womb and self.strength() > Propagator.CREATION_COST:
+            self._ready |= _TYPE_SENSOR
+            s = self.strength()
+        if not self.womb and s > Propagator.CREATION_COST:
             self.womb = BugKillaPropagator(self)
+            self._ready |= _WOMB
 
     # copied form Hunter as I think this makes a lot of sense to do it this way but idk bro
-    def reproduce_if_able(self):
-        if self.strength() >= 0.9 * Creature.MAX_STRENGTH:
-            for d in Direction:
+    # returns how many directions were already sensed, so move() doesn't pay to sense them again
+    def reproduce_if_able(self, s):
+        if s >= self._REPRO_THRESHOLD:
+            for i, d in enumerate(_DIRECTIONS):
                 nursery = self.type_sensor.sense(d)
                 if nursery == Plant:
                     self.womb.give_birth(self.strength()/2, d)
-                    return True
-        return False
+                    return i + 1
+            return len(_DIRECTIONS)
+        return 0
 
-    def move(self):
-        for d in Direction:
+    def move(self, start=0):
+        for d in _DIRECTIONS[start:]:
             block = self.type_sensor.sense(d)
             if block == Plant:
                 self.cilia.move_in_direction(d)
-        self.cilia.move_in_direction(Direction.random())
+                return
+        self.cilia.move_in_direction(_rand_dir())
 
 
 class MiniBugKilla(BugKilla):
-
-    def __init__(self):
-        super().__init__()
+    __slots__ = ()
 
 
 class Spiker(BugKilla):
-    def __init__(self):
-        super().__init__()
+    __slots__ = ('spikes',)
+    _ORGANS_NEEDED = _SPIKES | _WOMB | _TYPE_SENSOR
 
     def do_turn(self):
-        if not (self.spikes and self.womb and self.type_sensor):
+        if self._ready != self._ORGANS_NEEDED:
             self.create_organs()
         else:
-            self.reproduce_if_able()
+            self.reproduce_if_able(self.strength())
 
     def create_organs(self):
-        if not self.spikes and self.strength() > Spikes.CREATION_COST:
+        s = self.strength()
+        if not self.spikes and s > Spikes.CREATION_COST:
             self.spikes = Spikes(self)
-        if not self.womb and self.strength() > Propagator.CREATION_COST:
+            self._ready |= _SPIKES
+            s = self.strength()
+        if not self.womb and s > Propagator.CREATION_COST:
             self.womb = BugKillaPropagator(self)
-        if not self.type_sensor and self.strength() > CreatureTypeSensor.CREATION_COST:
+            self._ready |= _WOMB
+            s = self.strength()
+        if not self.type_sensor and s > CreatureTypeSensor.CREATION_COST:
             self.type_sensor = CreatureTypeSensor(self)
+            self._ready |= _TYPE_SENSOR
 
 
 class BugAttacker(BugKilla):
-    def __init__(self):
-        super().__init__()
+    __slots__ = ('energy_sensor',)
+    _ORGANS_NEEDED = _CILIA | _ENERGY_SENSOR
 
     def do_turn(self):
-        if not (self.cilia and self.energy_sensor):
+        if self._ready != self._ORGANS_NEEDED:
             self.create_organs()
         else:
             (did_attack, safe_dir) = self.find_someone_to_attack()
@@ -104,17 +131,22 @@ class BugAttacker(BugKilla):
                 self.cilia.move_in_direction(safe_dir)
 
     def create_organs(self):
-        if not self.cilia and self.strength() > Cilia.CREATION_COST:
+        s = self.strength()
+        if not self.cilia and s > Cilia.CREATION_COST:
             self.cilia = Cilia(self)
-        if not self.energy_sensor and self.strength() > EnergySensor.CREATION_COST:
+            self._ready |= _CILIA
+            s = self.strength()
+        if not self.energy_sensor and s > EnergySensor.CREATION_COST:
             self.energy_sensor = EnergySensor(self)
+            self._ready |= _ENERGY_SENSOR
 
+    # stops sensing at the first weak enough victim, since every sense costs energy
     def find_someone_to_attack(self):
+        sense = self.energy_sensor.sense
         safe_dir = Direction.N
-        for d in Direction:
-            victim = self.energy_sensor.sense(d)
-            current_strength = self.strength()
-            if current_strength*0.75 > victim > 0:
+        for d in _DIRECTIONS:
+            victim = sense(d)
+            if self.strength()*0.75 > victim > 0:
                 self.cilia.move_in_direction(d)
                 return True, d
             elif victim == 0:
@@ -123,27 +155,24 @@ class BugAttacker(BugKilla):
 
 
 class BugKillaPropagator(Propagator):
-    previous_counts = [1]*500
+    previous_counts = deque([1]*500)
+    attackerPercent = 0.2
+    spikerPercent = 0.0625
+    # cumulative odds of each kind of child, looked up with bisect_left so ties go to the earlier kind
+    small_odds = (attackerPercent, 1.0)
+    small_kinds = (BugAttacker, MiniBugKilla)
+    large_odds = (attackerPercent, attackerPercent + spikerPercent, 1.0)
+    large_kinds = (BugAttacker, Spiker, MiniBugKilla)
 
     def make_child(self):
         instance_count = BugKilla.instance_count()
-        randomNum = random()
-        attackerPercent = 0.2
-        spikerPercent = 0.0625
         BugKillaPropagator.previous_counts.append(instance_count)
-        count500 = BugKillaPropagator.previous_counts.pop(0)
+        count500 = BugKillaPropagator.previous_counts.popleft()
         if (instance_count >= count500-50 or instance_count > 400) and instance_count > 100:
             if instance_count < 200:
-                if randomNum <= attackerPercent:
-                    return BugAttacker()
-                else:
-                    return MiniBugKilla()
+                odds, kinds = self.small_odds, self.small_kinds
             else:
-                if randomNum <= attackerPercent:
-                    return BugAttacker()
-                elif randomNum <= spikerPercent + attackerPercent:
-                    return Spiker()
-                else:
-                    return MiniBugKilla()
+                odds, kinds = self.large_odds, self.large_kinds
+            return kinds[bisect_left(odds, random())]()
         else:
-            return MiniBugKilla()
\ No newline at end of file
+            return MiniBugKilla()
@@ -14,6 +14,13 @@ implementations in C++ and Java by Scott Knight and Greg Phillips
 
 from shared import Creature, Cilia, CreatureTypeSensor, Propagator, Direction, Soil, Plant
 
+_DIRECTIONS = tuple(Direction)
+_rand_dir = Direction.random
+
+# bits set in Hunter._ready as each organ is grown
+_CILIA, _TYPE_SENSOR, _WOMB = 1, 2, 4
+_ALL_ORGANS = _CILIA | _TYPE_SENSOR | _WOMB
+
 
 class Hunter(Creature):
     """
@@ -23,7 +30,9 @@ class Hunter(Creature):
     moves in a random direction.
     """
 
+    __slots__ = ('cilia', 'type_sensor', 'womb', '_ready')
     __instance_count = 0
+    _REPRO_THRESHOLD = 0.9 * Creature.MAX_STRENGTH
 
     def __init__(self):
         super().__init__()
@@ -31,15 +40,16 @@ class Hunter(Creature):
         self.cilia = None
         self.type_sensor = None
         self.womb = None
+        self._ready = 0
 
     def do_turn(self):
-        if not (self.cilia and self.type_sensor and self.womb):
+        if self._ready != _ALL_ORGANS:
             self.create_organs()
         else:
-            self.reproduce_if_able()
+            self.reproduce_if_able(self.strength())
             did_attack = self.find_someone_to_attack()
             if not did_attack:
-                self.cilia.move_in_direction(Direction.random())
+                self.cilia.move_in_direction(_rand_dir())
 
     @classmethod
     def instance_count(cls):
@@ -50,25 +60,31 @@ class Hunter(Creature):
         Hunter.__instance_count -= 1
 
     def create_organs(self):
-        if not self.cilia and self.strength() > Cilia.CREATION_COST:
+        s = self.strength()
+        if not self.cilia and s > Cilia.CREATION_COST:
             self.cilia = Cilia(self)
-        if not self.type_sensor and self.strength() > CreatureTypeSensor.CREATION_COST:
+            self._ready |= _CILIA
+            s = self.strength()
+        if not self.type_sensor and s > CreatureTypeSensor.CREATION_COST:
             self.type_sensor = CreatureTypeSensor(self)
-        if not self.womb and self.strength() > Propagator.CREATION_COST:
+            self._ready |= _TYPE_SENSOR
+            s = self.strength()
+        if not self.womb and s > Propagator.CREATION_COST:
             self.womb = HunterPropagator(self)
+            self._ready |= _WOMB
 
-    def reproduce_if_able(self):
-        if self.strength() >= 0.9 * Creature.MAX_STRENGTH:
-            for d in Direction:
+    def reproduce_if_able(self, s):
+        if s >= self._REPRO_THRESHOLD:
+            for d in _DIRECTIONS:
                 nursery = self.type_sensor.sense(d)
                 if nursery == Soil or nursery == Plant:
                     self.womb.give_birth(self.strength()/2, d)
                     break
 
     def find_someone_to_attack(self):
-        for d in Direction:
+        for d in _DIRECTIONS:
             victim = self.type_sensor.sense(d)
-            if victim != Soil and victim != Hunter and victim != LittleHunter:
+            if victim not in _NON_TARGETS:
                 self.cilia.move_in_direction(d)
                 return True
         return False
@@ -78,12 +94,11 @@ class LittleHunter(Hunter):
     """
     Minimal implementation of a helper creature; in real use you would override at least the
     do_turn method. Helper creatures must be a subclasses of the main creature class,
-    here the Hunter class, must call super().__init__(), and must not override __instance_count,
-    instance_count(), and destroyed().
+    here the Hunter class, must call super().__init__() if they define __init__, and must not
+    override __instance_count, instance_count(), and destroyed().
     """
 
-    def __init__(self):
-        super().__init__()
+    __slots__ = ()
 
 
 class HunterPropagator(Propagator):
@@ -91,3 +106,7 @@ class HunterPropagator(Propagator):
 
     def make_child(self):
         return LittleHunter()
+
+
+# Defined after the classes it names; looked up at call time by find_someone_to_attack.
+_NON_TARGETS = frozenset((Soil, Hunter, LittleHunter))
@@ -11,13 +11,16 @@ Based on an original design by Scott Knight and a series of
 implementations in C++ and Java by Scott Knight and Greg Phillips
 """
 
+import math
 import random
 import time
 import re
+import struct
 import tkinter as tk
 from multiprocessing import Pipe, Process
+from multiprocessing.shared_memory import SharedMemory
 
-from shared import Soil
+from shared import Soil, Plant
 
 COLOURS = ['#e6194b', '#0082c8', '#f58231', '#911eb4', '#46f0f0', '#f032e6', '#fabebe',
            '#008080', '#e6beff', '#aa6e28', '#800000', '#aaffc3', '#808000', '#ffd8b1',
@@ -25,29 +28,111 @@ COLOURS = ['#e6194b', '#0082c8', '#f58231', '#911eb4', '#46f0f0', '#f032e6', '#f
            '#f032e6', '#fabebe', '#008080', '#e6beff', '#aa6e28', '#800000', '#aaffc3',
            '#808000', '#ffd8b1', '#000080', '#808080']
 EMPTY_COLOUR = '#fffac8'
+EMPTY_SOIL = Soil()
+CAPITALIZED_WORD = re.compile('([A-Z][a-z]*)')
 
 
-def create_simulation(sim_end, world_width):
-    simulation = Simulation(sim_end, world_width)
+def create_simulation(sim_end, world_width, frame_name):
+    simulation = Simulation(sim_end, world_width, frame_name)
     simulation.run()
 
 
+def geometric_sites(count, probability):
+    """
+    Yields, in increasing order, the indices below count chosen independently with
+    the given probability. Rather than rolling for every index, it skips straight to
+    the next chosen index by drawing the geometrically distributed gap.
+    """
+    if probability <= 0:
+        return
+    if probability >= 1:
+        yield from range(count)
+        return
+    log_miss = math.log(1 - probability)
+    index = int(math.log(1.0 - random.random()) / log_miss)
+    while index < count:
+        yield index
+        index += 1 + int(math.log(1.0 - random.random()) / log_miss)
+
+
 class Receiver:
+    """
+    Passes simulation state to the GUI listeners. Resets and palette changes arrive
+    as messages on the connection; the state after each turn is read from the
+    SharedFrame, so only the latest turn is ever drawn.
+
+    Where Tk supports file handlers, messages are handled as soon as they arrive.
+    The frame is checked every BUSY_POLL ms while turns are coming in, and every
+    IDLE_POLL ms while they are not, e.g. when the simulation is paused. If the
+    simulation process exits, the last turn it wrote stays on screen and polling stops.
+    """
 
-    def __init__(self, connection, event_loop, listeners):
-        self.connection, self.event_loop, self.listeners = connection, event_loop, listeners
+    BUSY_POLL = 10
+    IDLE_POLL = 50
+
+    def __init__(self, connection, frame, event_loop, listeners):
+        self.connection, self.frame, self.event_loop, self.listeners = connection, frame, event_loop, listeners
+        self.snapshot = None
+        self.connected = True
+        try:
+            event_loop.tk.createfilehandler(connection.fileno(), tk.READABLE, self.on_readable)
+        except AttributeError:
+            pass  # no file handlers on Windows; receive() drains the connection instead
+
+    def on_readable(self, _file, _mask):
+        self.receive_messages()
+
+    def receive_messages(self):
+        try:
+            while self.connected and self.connection.poll():
+                self.connection.recv().run_on(self)
+        except (EOFError, OSError):
+            self.disconnect()
+
+    def disconnect(self):
+        """
+        Stops listening to a simulation that has exited. A receive() call is always
+        pending or running while connected; it draws the last turn written and then
+        does not reschedule itself.
+        """
+        self.connected = False
+        try:
+            self.event_loop.tk.deletefilehandler(self.connection.fileno())
+        except (AttributeError, OSError):
+            pass
 
     def receive(self):
-        snapshot = None
-        while self.connection.poll():
-            snapshot = self.connection.recv()
+        self.receive_messages()
+        new_turn = self.snapshot and self.frame.turn_count() > self.snapshot.turn_count
+        if new_turn:
+            self.draw_latest_turn()
+        # once disconnected, the read above was the last, so the final turn written stays drawn
+        if self.connected:
+            self.event_loop.after(self.BUSY_POLL if new_turn else self.IDLE_POLL, self.receive)
+
+    def draw_latest_turn(self):
+        """
+        Draws the frame's turn. A turn whose colours are not all in the palette yet
+        waits for the update sent ahead of it, and a turn overwritten while it was
+        being copied is left for the next poll.
+        """
+        if self.frame.palette_size() > len(self.snapshot.palette):
+            # the palette update for this turn may have arrived since the connection was drained
+            self.receive_messages()
+        snapshot = self.frame.read(self.snapshot.competitor_classes, self.snapshot.palette)
         if snapshot:
+            self.snapshot = snapshot
             for listener in self.listeners:
-                if snapshot.turn_count == 0:
-                    listener.initialize(snapshot)
-                else:
-                    listener.changed(snapshot)
-        self.event_loop.after(10, self.receive)
+                listener.changed(snapshot)
+
+    def initialize(self, snapshot):
+        self.snapshot = snapshot
+        for listener in self.listeners:
+            listener.initialize(snapshot)
+
+    def set_palette(self, palette):
+        if self.snapshot:
+            self.snapshot.palette = palette
 
 
 class BugBattle(tk.Frame):
@@ -64,6 +149,7 @@ class BugBattle(tk.Frame):
         world_view = WorldView(self, world_width)
         scoreboard = ScoreBoard(self)
         sim_end, gui_end = Pipe()
+        self.frame = SharedFrame(world_width)
         proxy = SimulationProxy(gui_end)
         control_panel = ControlPanel(self, proxy, competitor_classes)
         self.rowconfigure(0, weight=0)
@@ -71,14 +157,16 @@ class BugBattle(tk.Frame):
         control_panel.grid(row=0, column=0, sticky=tk.N)
         scoreboard.grid(row=1, column=0, sticky=tk.N, pady=20)
         world_view.grid(row=0, column=1, rowspan=2)
-        receiver = Receiver(gui_end, self, [world_view, scoreboard, control_panel])
-        self.simulation = Process(target=create_simulation, args=(sim_end, world_width))
+        receiver = Receiver(gui_end, self.frame, self, [world_view, scoreboard, control_panel])
+        self.simulation = Process(target=create_simulation, args=(sim_end, world_width, self.frame.name))
         self.simulation.start()
         receiver.receive()
         sim_end.close()
 
     def on_closing(self):
         self.simulation.terminate()
+        self.frame.close()
+        self.frame.unlink()
         self.root.destroy()
 
 
@@ -87,39 +175,72 @@ class WorldView(tk.Canvas):
     Displays the BugBattle world on a tk.Canvas.
     The World is represented as a square grid of cells, each CELL_SIZE wide, and each
     displaying the colour of the creature found at that location in the World.
+    The cells are painted into a single tk.PhotoImage, so updating a frame costs one
+    Tcl call per changed cell rather than one canvas item per cell.
     """
 
     CELL_SIZE = 7  # 11 is 1080p
+    UNPAINTED = 255  # never a palette index
 
     def __init__(self, master, world_width):
         width = self.CELL_SIZE * world_width
         super().__init__(master, width=width, height=width, background=EMPTY_COLOUR, borderwidth=0,
                          highlightthickness=0)
-        self.tiles = []
-        self.initialize_tiles(world_width)
-        self.previous = [None] * world_width * world_width
+        self.world_width = world_width
+        self.image = tk.PhotoImage(master=self, width=width, height=width)
+        self.create_image(0, 0, anchor=tk.NW, image=self.image)
+        self.cells = {}
+        self.previous = bytearray([self.UNPAINTED]) * world_width * world_width
 
     def initialize(self, snapshot):
-        self.update_tiles(snapshot.colours)
+        self.paint_all(snapshot.colour_indices, snapshot.palette)
 
     def changed(self, snapshot):
-        self.update_tiles(snapshot.colours)
-
-    def initialize_tiles(self, world_width):
-        """Create the tiles representing the world, setting each to transparent."""
-        w = self.CELL_SIZE
-        for row in range(world_width):
-            for column in range(world_width):
-                tile = self.create_oval(column * w, row * w,
-                                        (column + 1) * w, (row + 1) * w,
-                                        fill='', width=0)
-                self.tiles.append(tile)
+        self.update_tiles(snapshot.colour_indices, snapshot.palette)
 
-    def update_tiles(self, colours):
-        for index, colour in enumerate(colours):
-            if colour != self.previous[index]:
-                self.itemconfigure(self.tiles[index], fill=colour)
-        self.previous = colours
+    def cell(self, colour):
+        """
+        Returns the pixel rows of one cell, a dot of colour on the empty background,
+        and the same pixels as PhotoImage data.
+        """
+        cell = self.cells.get(colour)
+        if cell is None:
+            w = self.CELL_SIZE
+            radius = w / 2
+            fill = colour or EMPTY_COLOUR
+            rows = []
+            for y in range(w):
+                pixels = []
+                for x in range(w):
+                    inside = (x + 0.5 - radius) ** 2 + (y + 0.5 - radius) ** 2 <= radius ** 2
+                    pixels.append(fill if inside else EMPTY_COLOUR)
+                rows.append(' '.join(pixels))
+            cell = self.cells[colour] = (rows, ' '.join('{' + row + '}' for row in rows))
+        return cell
+
+    def paint_all(self, colour_indices, palette):
+        """Repaint the whole world with a single PhotoImage.put."""
+        n = self.world_width
+        image_rows = []
+        for start in range(0, n * n, n):
+            cells = [self.cell(palette[ix])[0] for ix in colour_indices[start:start + n]]
+            for y in range(self.CELL_SIZE):
+                image_rows.append('{' + ' '.join(cell[y] for cell in cells) + '}')
+        self.image.put(' '.join(image_rows))
+        self.previous[:] = colour_indices
+
+    def update_tiles(self, colour_indices, palette):
+        """Repaint the cells that changed, skipping unchanged rows with a single comparison each."""
+        w, n = self.CELL_SIZE, self.world_width
+        previous = self.previous
+        for row, start in enumerate(range(0, n * n, n)):
+            if colour_indices[start:start + n] == previous[start:start + n]:
+                continue
+            for column in range(n):
+                ix = colour_indices[start + column]
+                if ix != previous[start + column]:
+                    self.image.put(self.cell(palette[ix])[1], to=(column * w, row * w))
+                    previous[start + column] = ix
 
 
 class SimulationProxy:
@@ -173,34 +294,111 @@ class ResetCommand:
 
 
 class Snapshot:
+    """
+    The state of the simulation as seen by the GUI. Each location's colour is an
+    index into the palette. Sent on reset, when it initializes the GUI listeners;
+    after that, snapshots are read from the SharedFrame.
+    """
+
+    def __init__(self, turn_count, tps, game_over, competitor_classes, counts, palette, colour_indices):
+        self.turn_count, self.tps, self.game_over = turn_count, tps, game_over
+        self.competitor_classes, self.counts = competitor_classes, counts
+        self.palette, self.colour_indices = palette, colour_indices
+
+    def run_on(self, receiver):
+        receiver.initialize(self)
+
 
-    def __init__(self, simulation):
-        self.tps = simulation.tps
-        self.turn_count = simulation.turn_count
-        self.game_over = simulation.game_over
-        self.competitor_classes = simulation.competitor_classes
-        self.counts = [competitor.instance_count() for competitor in simulation.competitor_classes]
-        self.colours = [creature.colour for creature in simulation.world.locations]
+class PaletteUpdate:
+    """Sent when a creature colour not seen since the last reset is added to the palette."""
+
+    def __init__(self, palette):
+        self.palette = palette
+
+    def run_on(self, receiver):
+        receiver.set_palette(self.palette)
+
+
+class SharedFrame:
+    """
+    The latest turn of the simulation, in memory shared between the simulation and
+    GUI processes. The simulation overwrites it in place each turn and the GUI reads
+    it when it redraws, so nothing is queued or pickled per turn. A fixed header
+    (sequence number, turn count, palette size, tps, game over flag, and a count per
+    competitor) is followed by one palette index per world location.
+
+    The sequence number is odd while a turn is being written and even once it is
+    complete, so the reader can tell when its copy mixes two turns and discard it.
+    """
+
+    SEQUENCE = struct.Struct('<I')
+    HEADER = struct.Struct('<IIId?{}i'.format(len(COLOURS)))
+
+    def __init__(self, world_width, name=None):
+        self.n_cells = world_width * world_width
+        self.memory = SharedMemory(name=name, create=name is None, size=self.HEADER.size + self.n_cells)
+        self.name = self.memory.name
+        self.sequence = 0
+
+    def write(self, turn_count, palette_size, tps, game_over, counts, colour_indices):
+        buf, start = self.memory.buf, self.HEADER.size
+        self.sequence += 1
+        self.SEQUENCE.pack_into(buf, 0, self.sequence)
+        buf[start:start + self.n_cells] = colour_indices
+        padding = [0] * (len(COLOURS) - len(counts))
+        self.HEADER.pack_into(buf, 0, self.sequence, turn_count, palette_size, tps, game_over, *counts, *padding)
+        self.sequence += 1
+        self.SEQUENCE.pack_into(buf, 0, self.sequence)
+
+    def turn_count(self):
+        return struct.unpack_from('<I', self.memory.buf, 4)[0]
+
+    def palette_size(self):
+        return struct.unpack_from('<I', self.memory.buf, 8)[0]
+
+    def read(self, competitor_classes, palette):
+        """
+        Returns the latest turn as a Snapshot, or None if it was overwritten while being
+        copied or uses colours that have not yet reached the given palette.
+        """
+        buf, start = self.memory.buf, self.HEADER.size
+        header = self.HEADER.unpack_from(buf)
+        colour_indices = bytes(buf[start:start + self.n_cells])
+        sequence, turn_count, palette_size, tps, game_over = header[:5]
+        if sequence % 2 or self.SEQUENCE.unpack_from(buf)[0] != sequence or palette_size > len(palette):
+            return None
+        counts = list(header[5:5 + len(competitor_classes)])
+        return Snapshot(turn_count, tps, game_over, competitor_classes, counts, palette, colour_indices)
+
+    def close(self):
+        self.memory.close()
+
+    def unlink(self):
+        self.memory.unlink()
 
 
 class Simulation:
     INITIAL_PLANT_PROBABILITY = 0.12
     START_STRENGTH = 1500
     N_CREATURES = 3
+    SPIN_TIME = 0.002
 
-    def __init__(self, connection, world_width):
+    def __init__(self, connection, world_width, frame_name):
         super().__init__()
         self.connection = connection
+        self.frame = SharedFrame(world_width, frame_name)
+        self.palette_size_sent = 0
         self.competitor_classes = []
+        self.live_competitors = []
         self.interval = 0.5
         self.running = False
         self.game_over = False
         self.world = World(world_width)
         self.last_start = self.turn_count = self.tps = self.after_id = 0
-        self.latest_snapshot_sent = None
 
     def reset(self, competitor_classes, interval):
         self.competitor_classes = competitor_classes
+        self.live_competitors = list(competitor_classes)
         self.set_interval(interval)
         self.running = False
         self.game_over = False
@@ -213,41 +411,68 @@ class Simulation:
             setattr(competitor, '_{}__instance_count'.format(competitor.__name__), 0)
             competitor.colour = COLOURS[index]
             self.populate(competitor, self.N_CREATURES)
-        self.connection.send(Snapshot(self))
+        colour_indices = bytes(self.world.colour_indices)
+        counts = self.counts()
+        self.palette_size_sent = len(self.world.palette)
+        self.frame.write(0, self.palette_size_sent, 0, False, counts, colour_indices)
+        self.connection.send(Snapshot(0, 0, False, competitor_classes, counts, list(self.world.palette),
+                                      colour_indices))
 
     def set_interval(self, interval):
         self.interval = interval
 
-    def create_snapshot(self):
-        self.latest_snapshot_sent = Snapshot(self)
+    def counts(self):
+        return [competitor.instance_count() for competitor in self.competitor_classes]
+
+    def write_frame(self):
+        """Any new colours are sent before the frame that uses them is written."""
+        palette = self.world.palette
+        if len(palette) > self.palette_size_sent:
+            self.palette_size_sent = len(palette)
+            self.connection.send(PaletteUpdate(list(palette)))
+        self.frame.write(self.turn_count, self.palette_size_sent, self.tps, self.game_over, self.counts(),
+                         self.world.colour_indices)
 
     def run(self):
         while True:
             if self.running and not self.game_over:
-                start = time.time()
+                start = time.perf_counter()
                 self.calculate_tps(start)
                 self.world.do_turn()
                 self.turn_count += 1
                 self.check_win()
-                self.connection.send(Snapshot(self))
-                turn_time = time.time() - start
-                time.sleep(max(0.0, self.interval - turn_time))
-                self.process_commands()
+                self.write_frame()
+                self.wait_for_next_turn(start)
             else:
                 self.connection.poll(0.5)
                 self.process_commands()
 
+    def wait_for_next_turn(self, start):
+        """
+        Wait until interval has passed since start, running commands as they arrive.
+        Waiting is done in connection.poll, which wakes as soon as a command is sent;
+        the last SPIN_TIME is spent spinning, since short sleeps tend to oversleep.
+        """
+        while self.running:
+            remaining = start + self.interval - time.perf_counter()
+            if remaining <= self.SPIN_TIME:
+                break
+            if self.connection.poll(remaining - self.SPIN_TIME):
+                self.process_commands()
+        while self.running and time.perf_counter() < start + self.interval:
+            pass
+        self.process_commands()
+
     def process_commands(self):
         while self.connection.poll():
             command = self.connection.recv()
             command.run_on(self)
 
     def check_win(self):
-        live_competitors = 0
-        for competitor in self.competitor_classes:
-            if competitor.instance_count() != 0:
-                live_competitors += 1
-        if live_competitors == 1:
+        """A competitor with no creatures left can never come back, so only the survivors are rechecked."""
+        self.live_competitors = [competitor for competitor in self.live_competitors
+                                 if competitor.instance_count() != 0]
+        if len(self.live_competitors) == 1:
             self.game_over = True
 
     def start(self):
@@ -266,9 +491,9 @@ class Simulation:
         self.last_start = start
 
     def grow_initial_plants(self):
-        for soil in self.world.locations:
-            if random.random() < self.INITIAL_PLANT_PROBABILITY:
-                soil.become_plant()
+        """Turn each location into a plant with INITIAL_PLANT_PROBABILITY."""
+        for index in geometric_sites(len(self.world.locations), self.INITIAL_PLANT_PROBABILITY):
+            self.world.place(Plant(), index)
 
     def populate(self, creature_class, n):
         """
@@ -284,27 +509,53 @@ class Simulation:
 class World:
     """
     Looks after the location of all creatures in the World and allows
-    each to perform its turn. Empty locations are represented by instances
-    of Soil.
+    each to perform its turn. Empty locations all hold the same Soil,
+    EMPTY_SOIL, and the World grows plants on them.
+
+    Two indexes are kept up to date as creatures are placed, so neither the
+    death sweep nor publishing a turn has to visit every location: occupied
+    holds the indices of the locations that are not empty, and colour_indices
+    holds the palette index of the colour of the creature at each location.
     """
 
     def __init__(self, width):
         self.width = width
         self.locations = []
+        self.colour_indices = bytearray(width * width)
+        self.palette = []
+        self.palette_indices = {}
+        self.neighbours = self._neighbour_table()
         self.reset()
 
     def reset(self):
         if self.locations:
             for location in self.locations:
-                location.destroyed()
+                if location is not EMPTY_SOIL:
+                    location.destroyed()
+        self.palette = []
+        self.palette_indices = {}
+        self.occupied = set()
         self.locations = [None for _ in range(self.width * self.width)]
         for index in range(len(self.locations)):
-            self.place(Soil(), index)
+            self.place(EMPTY_SOIL, index)
 
     def place(self, creature, destination):
-        creature.f_set_location(destination)
         self.locations[destination] = creature
-        creature.f_set_world(self)
+        if creature is EMPTY_SOIL:
+            self.occupied.discard(destination)
+        else:
+            self.occupied.add(destination)
+            creature.f_set_location(destination)
+            creature.f_set_world(self)
+        colour_index = self.palette_indices.get(creature.colour)
+        if colour_index is None:
+            colour_index = self.add_to_palette(creature.colour)
+        self.colour_indices[destination] = colour_index
+
+    def add_to_palette(self, colour):
+        self.palette_indices[colour] = len(self.palette)
+        self.palette.append(colour)
+        return self.palette_indices[colour]
 
     def replace(self, original, replacement):
         try:
@@ -326,10 +577,10 @@ class World:
     def creature_at_offset_from(self, creature, bearing):
         try:
             start = self.location_of(creature)
-            target = self._location_offset(start, bearing)
-            return self.creature_at(target)
+            target = self.neighbours[bearing.dy + 1][bearing.dx + 1][start]
+            return self.locations[target]
         except ValueError:
-            return Soil()
+            return EMPTY_SOIL
 
     def do_turn(self):
         """
@@ -341,15 +592,27 @@ class World:
         west or south would get more than one turn in a single world turn (since
         it could have moved into a location whose turn had not yet come up). So,
         we call do_turn over a copy of the locations list.
+
+        Only occupied locations and this turn's sprout sites are visited, still in
+        location order. A sprout site that was empty at the start of the turn grows
+        a plant, provided nothing has moved into it earlier in the turn.
         """
-        for creature in self.locations:
-            creature.f_metabolic_cycle()
-        for ix, creature in enumerate(self.locations[:]):
-            creature.do_turn()
-            creature.f_cap_strength()
-        for creature in self.locations[:]:
-            if not creature.is_alive():
-                self.replace(creature, Soil())
+        locations = self.locations
+        for index in self.occupied:
+            locations[index].f_metabolic_cycle()
+        starting = locations[:]
+        sprout_sites = geometric_sites(len(locations), Soil.F_PLANT_GROWTH_PROBABILITY)
+        for ix in sorted(self.occupied.union(sprout_sites)):
+            creature = starting[ix]
+            if creature is EMPTY_SOIL:
+                if locations[ix] is EMPTY_SOIL:
+                    self.place(Plant(), ix)
+            else:
+                creature.do_turn()
+                creature.f_cap_strength()
+        for index in list(self.occupied):
+            if not self.locations[index].is_alive():
+                self.place(EMPTY_SOIL, index)
 
     def move(self, attacker, bearing):
         """
@@ -364,11 +627,11 @@ class World:
             start = self.location_of(attacker)
         except ValueError:
             return
-        self.place(Soil(), start)
+        self.place(EMPTY_SOIL, start)
         self.launch_attack(start, bearing, attacker)
 
     def launch_attack(self, start, bearing, attacker):
-        battleground = self._location_offset(start, bearing)
+        battleground = self.neighbours[bearing.dy + 1][bearing.dx + 1][start]
         winner = attacker.f_attack(self.locations[battleground])
         self.place(winner, battleground)
 
@@ -379,11 +642,15 @@ class World:
         except ValueError:
             pass
 
-    def _location_offset(self, start, bearing):
-        """Returns the start location offset by bearing, accounting for edge wrapping."""
-        new_x = (start % self.width + bearing.dx) % self.width
-        new_y = (start // self.width + bearing.dy) % self.width
-        return new_y * self.width + new_x
+    def _neighbour_table(self):
+        """
+        Returns a table of every location offset by every bearing, accounting for
+        edge wrapping, indexed as table[dy + 1][dx + 1][start].
+        """
+        w = self.width
+        return [[[(start // w + dy) % w * w + (start % w + dx) % w for start in range(w * w)]
+                 for dx in (-1, 0, 1)]
+                for dy in (-1, 0, 1)]
 
 
 class ScoreBoard(tk.Frame):
@@ -440,7 +707,7 @@ class ScoreBoard(tk.Frame):
     @staticmethod
     def group_name(competitor):
         name = competitor.__module__.split('.')[-1]
-        return re.sub('([A-Z][a-z]*)', r'\1 ', name).strip()
+        return CAPITALIZED_WORD.sub(r'\1 ', name).strip()
 
     def changed(self, snapshot):
         self.grid_propagate(False)
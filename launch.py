@@ -5,6 +5,8 @@ Competitors live in the `competitors` module. To add a competitor
 to the game, import its class and add it to the  `COMPETITOR_CLASSES`
 tuple.
 
+The framework and shared modules use only the Python standard library.
+
 version 1.13
 2021-11-23
 
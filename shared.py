@@ -63,6 +63,9 @@ class Creature(ABC):
     __MAX_ORGANS = MAX_ORGANS = 10
     __DEAD_COLOUR = 'black'
 
+    __slots__ = ('__world', '__location', '__alive', '__strength', '__colour', '__organs',
+                 '__cloaked', '__poisonous')
+
     def __init__(self):
         self.__world = None
         self.__location = None
@@ -155,13 +158,11 @@ class Creature(ABC):
         self.__world.replace(self, replacement)
 
     def f_attack(self, defender):
-        if not defender.f_fights_back():
-            return self.__attacker_wins(defender)
-        if not self.f_fights_back():
+        # a defender that fights back wins unless the attacker fights and is strictly stronger
+        if defender.f_fights_back() and (not self.f_fights_back()
+                                         or self.strength() <= defender.strength()):
             return self.__defender_wins(defender)
-        if self.strength() > defender.strength():
-            return self.__attacker_wins(defender)
-        return self.__defender_wins(defender)
+        return self.__attacker_wins(defender)
 
     def __defender_wins(self, defender):
         defender.f_feed(self.strength() - self.f_defensive_damage())
@@ -187,20 +188,25 @@ class Creature(ABC):
 
 
 class Soil(Creature):
-    __PLANT_GROWTH_PROBABILITY = 0.01
+    """
+    Fills every empty location. The framework uses one instance for all empty
+    locations, so that instance is never given a world or a location; nothing may
+    rely on them. Each turn, a plant sprouts in each empty location with
+    probability F_PLANT_GROWTH_PROBABILITY.
+    """
+
+    F_PLANT_GROWTH_PROBABILITY = 0.01
     __instance_count = 0
     colour = ''
 
+    __slots__ = ()
+
     def __init__(self):
         super().__init__()
         Soil.__instance_count += 1
 
     def do_turn(self):
-        if random.random() < self.__PLANT_GROWTH_PROBABILITY:
-            self.become_plant()
-
-    def become_plant(self):
-        self.f_replace_me_with(Plant())
+        pass
 
     @classmethod
     def instance_count(cls):
@@ -231,13 +237,20 @@ class Plant(Creature):
     __instance_count = 0
     colour = '#d2f53c'
 
+    __slots__ = ('propagator',)
+
     def __init__(self):
         super().__init__()
         Plant.__instance_count += 1
-        self.f_feed(PhotoGland.CREATION_COST + Propagator.CREATION_COST)
-        PhotoGland(self)
+        self.f_feed(Propagator.CREATION_COST)
         self.propagator = PlantPropagator(self)
 
+    def f_metabolic_cycle(self):
+        # Plants photosynthesize as if they carried a PhotoGland ahead of their propagator;
+        # the gland keeps no state, so it isn't built for every plant.
+        self.f_expend(PhotoGland.MAINTENANCE_COST)
+        super().f_metabolic_cycle()
+
     @staticmethod
     def f_fights_back():
         return False
@@ -260,6 +273,8 @@ class PoisonDrop(Creature):
     __instance_count = 0
     colour = 'black'
 
+    __slots__ = ('__gland',)
+
     def __init__(self, volume):
         super().__init__()
         self.f_feed(1 + volume)
@@ -275,9 +290,9 @@ class PoisonDrop(Creature):
         pass
 
     def do_turn(self):
-        volume = math.ceil(self.__gland.current_volume() * self.F_DISSIPATION_RATE)
-        self.__gland.remove_poison(volume)
-        if self.__gland.current_volume() <= 0:
+        gland = self.__gland
+        gland.remove_poison(math.ceil(gland.current_volume() * self.F_DISSIPATION_RATE))
+        if gland.current_volume() <= 0:
             self.f_die()
 
     @classmethod
@@ -302,14 +317,22 @@ class Direction(Enum):
     def __init__(self, dx, dy):
         self.dx, self.dy = dx, dy
 
-    # noinspection PyArgumentList
     def opposite(self):
-        return Direction((-self.dx, -self.dy))
+        return self._opposite
+
+    @staticmethod
+    def random():
+        # there are exactly eight directions, so three random bits pick one uniformly
+        return _DIRECTIONS[random.getrandbits(3)]
 
-    # noinspection PyTypeChecker
-    @classmethod
-    def random(cls):
-        return random.choice(list(cls))
+
+_DIRECTIONS = tuple(Direction)
+
+# Each member's opposite is looked up once here, rather than by value on every call.
+for _direction in Direction:
+    # noinspection PyArgumentList
+    _direction._opposite = Direction((-_direction.dx, -_direction.dy))
+del _direction
 
 
 class Organ(ABC):
@@ -317,6 +340,8 @@ class Organ(ABC):
     F_USE_COST = None
     F_MAINTENANCE_COST = None
 
+    __slots__ = ('__host', '__uses_this_turn')
+
     def __init__(self, host: Creature):
         self.__host = host
         host.f_add_organ(self)
@@ -347,8 +372,9 @@ class Organ(ABC):
         return 0
 
     def f_host_would_be_alive_after_use(self):
-        self.host().f_expend(self.use_cost())
-        return self.__host.is_alive()
+        host = self.__host
+        host.f_expend(self.use_cost())
+        return host.is_alive()
 
 
 class Cilia(Organ):
@@ -356,6 +382,8 @@ class Cilia(Organ):
     F_MAINTENANCE_COST = MAINTENANCE_COST = 10
     F_USE_COST = USE_COST = 20
 
+    __slots__ = ()
+
     def move_in_direction(self, bearing):
         if self.f_host_would_be_alive_after_use() and self.f_uses_this_turn() == 0:
             self.f_used_once()
@@ -366,12 +394,16 @@ class PhotoGland(Organ):
     F_CREATION_COST = CREATION_COST = 250
     F_MAINTENANCE_COST = MAINTENANCE_COST = -150
 
+    __slots__ = ()
+
 
 class Propagator(Organ, ABC):
     F_CREATION_COST = CREATION_COST = 50
     F_MAINTENANCE_COST = MAINTENANCE_COST = 5
     F_USE_COST = USE_COST = 100
 
+    __slots__ = ()
+
     def give_birth(self, initial_energy, direction):
         self.host().f_expend(initial_energy)
         if self.f_host_would_be_alive_after_use():
@@ -385,6 +417,7 @@ class Propagator(Organ, ABC):
 
 
 class PlantPropagator(Propagator):
+    __slots__ = ()
 
     def make_child(self):
         return Plant()
@@ -395,6 +428,8 @@ class Cloaking(Organ):
     F_MAINTENANCE_COST = MAINTENANCE_COST = 10
     F_USE_COST = USE_COST = 100
 
+    __slots__ = ()
+
     def cloak(self):
         if self.f_host_would_be_alive_after_use():
             self.host().f_cloak()
@@ -409,10 +444,12 @@ class Cloaking(Organ):
 class Sensor(Organ, ABC):
     F_DEFAULT_VALUE = None
 
+    __slots__ = ()
+
     def sense(self, direction):
         if self.f_host_would_be_alive_after_use():
-            target = self.host().f_world().creature_at_offset_from(self.host(), direction)
-            return self.sensor_value(target)
+            host = self.host()
+            return self.sensor_value(host.f_world().creature_at_offset_from(host, direction))
         else:
             return self.F_DEFAULT_VALUE
 
@@ -427,6 +464,8 @@ class EnergySensor(Sensor):
     F_MAINTENANCE_COST = MAINTENANCE_COST = 10
     F_USE_COST = USE_COST = 2
 
+    __slots__ = ()
+
     def sensor_value(self, target):
         return target.f_apparent_strength()
 
@@ -437,6 +476,8 @@ class CreatureTypeSensor(Sensor):
     F_MAINTENANCE_COST = MAINTENANCE_COST = 10
     F_USE_COST = USE_COST = 2
 
+    __slots__ = ()
+
     def sensor_value(self, target):
         return target.f_apparent_type()
 
@@ -447,6 +488,8 @@ class LifeSensor(Sensor):
     F_MAINTENANCE_COST = MAINTENANCE_COST = 5
     F_USE_COST = USE_COST = 1
 
+    __slots__ = ()
+
     def sensor_value(self, target):
         return target.f_apparent_type() != Soil
 
@@ -457,6 +500,8 @@ class PoisonSensor(Sensor):
     F_MAINTENANCE_COST = MAINTENANCE_COST = 5
     F_USE_COST = USE_COST = 1
 
+    __slots__ = ()
+
     def sensor_value(self, target):
         return target.f_appears_poisonous()
 
@@ -467,6 +512,8 @@ class PoisonGland(Organ):
     __RESERVOIR_CAPACITY = 1000
     __DAMAGE_MULTIPLIER = 4
 
+    __slots__ = ('__reservoir_volume',)
+
     def __init__(self, host):
         super().__init__(host)
         self.host().f_become_poisonous()
@@ -503,5 +550,7 @@ class Spikes(Organ):
     F_MAINTENANCE_COST = MAINTENANCE_COST = 5
     F_DEFENSIVE_DAMAGE = DEFENSIVE_DAMAGE = 200
 
+    __slots__ = ()
+
     def f_defensive_damage(self):
         return self.F_DEFENSIVE_DAMAGE